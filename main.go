@@ -1,10 +1,12 @@
 package main
 
 import (
+	"bufio"
 	"fmt"
 	"log"
 	"net/http"
 	"os"
+	"strconv"
 	"strings"
 	"sync"
 	"time"
@@ -16,35 +18,45 @@ import (
 var (
 	baseUrl      = "https://weibo.com/ajax/favorites/all_fav?"
 	page         = 1
-	weiboChan    = make(chan weibo, 1000)
+	weiboChan    = make(chan weiboPage, 1000)
 	workerNumber = 2 // Maximum number of workers that can run at the same time
 )
 
 func getWeiboFav(cookie string, pageNumber int, wg *sync.WaitGroup) {
 
 	workerCh := make(chan struct{}, workerNumber)
-	defer close(workerCh)
-	done := make(chan bool)
+	done := make(chan struct{})
+	var once sync.Once
+	stop := func() { once.Do(func() { close(done) }) }
+	fetchWg := new(sync.WaitGroup)
+	defer fetchWg.Wait()
 
 	for {
 		select {
 		case <-done:
 			log.Println("no data, maybe is done")
 			return
-		default:
+		case workerCh <- struct{}{}:
+			// done and a free slot can be ready together, re-check before scheduling another page
+			select {
+			case <-done:
+				log.Println("no data, maybe is done")
+				return
+			default:
+			}
 			if pageNumber != 0 && page > pageNumber {
 				return
-			} else {
-				workerCh <- struct{}{}
-				url := baseUrl + fmt.Sprintf("page=%v", page)
-				get(url, cookie, workerCh, done, wg)
-				page++
 			}
+			url := baseUrl + "page=" + strconv.Itoa(page)
+			fetchWg.Add(1)
+			go get(page, url, cookie, workerCh, stop, wg, fetchWg)
+			page++
 		}
 	}
 }
 
-func get(url, cookie string, workerCh chan struct{}, done chan bool, wg *sync.WaitGroup) {
+func get(page int, url, cookie string, workerCh chan struct{}, stop func(), wg, fetchWg *sync.WaitGroup) {
+	defer fetchWg.Done()
 	log.Println("start get", url)
 	r := requests.GET(url, requests.WithCookie(cookie))
 	if r.StatusCode() != http.StatusOK {
@@ -54,13 +66,16 @@ func get(url, cookie string, workerCh chan struct{}, done chan bool, wg *sync.Wa
 	m := r.Map()
 	data := m["data"].([]any)
 	if len(data) == 0 {
-		done <- true
+		stop()
 	}
+	weibos := make([]weibo, 0, len(data))
 	for _, d := range data {
 		dd := d.(map[string]any)
-		wg.Add(1)
-		weiboChan <- parseWeibo(dd)
+		weibos = append(weibos, parseWeibo(dd))
 	}
+	// send every page, even an empty one, so the writer can keep page order
+	wg.Add(1)
+	weiboChan <- weiboPage{page: page, weibos: weibos}
 
 	<-workerCh
 }
@@ -73,24 +88,28 @@ type weibo struct {
 	url        string
 }
 
+type weiboPage struct {
+	page   int
+	weibos []weibo
+}
+
 func parseWeibo(d map[string]any) weibo {
 	weibo := weibo{}
 	weibo.id = d["idstr"].(string)
 	// weibo.url https://weibo.com/<user.idstr>/<mblogid>
-	if _, ok := d["user"]; ok {
-		user := d["user"].(map[string]any)
-		weibo.url = fmt.Sprintf("https://weibo.com/%v/%v", user["idstr"].(string), d["mblogid"].(string))
+	if user, ok := d["user"].(map[string]any); ok {
+		weibo.url = "https://weibo.com/" + user["idstr"].(string) + "/" + d["mblogid"].(string)
 	}
-	if _, ok := d["isLongText"]; ok {
-		weibo.isLongText = d["isLongText"].(bool)
+	if isLongText, ok := d["isLongText"].(bool); ok {
+		weibo.isLongText = isLongText
 	}
-	if _, ok := d["text"]; ok {
-		weibo.text = d["text"].(string)
+	if text, ok := d["text"].(string); ok {
+		weibo.text = text
 	} else {
 		weibo.text = "no text"
 	}
-	if _, ok := d["url_struct"]; ok {
-		url_struct := d["url_struct"].([]any)
+	if url_struct, ok := d["url_struct"].([]any); ok {
+		weibo.links = make([]string, 0, len(url_struct))
 		for _, u := range url_struct {
 			uu := u.(map[string]any)
 			weibo.links = append(weibo.links, uu["long_url"].(string))
@@ -121,12 +140,27 @@ var rootCmd = &cobra.Command{
 			log.Fatalln(err)
 		}
 		defer f.Close()
+		bw := bufio.NewWriter(f)
 		wg := new(sync.WaitGroup)
+		// pages may arrive out of order, hold them until the earlier ones are written
+		next := page
 		go func() {
-			for w := range weiboChan {
-				_, err := f.WriteString(fmt.Sprintf("%s\t%s\t%s\t%t\t%s\n", w.id, w.url, w.text, w.isLongText, strings.Join(w.links, " , ")))
-				if err != nil {
-					log.Fatalln(err)
+			pending := make(map[int][]weibo)
+			for p := range weiboChan {
+				pending[p.page] = p.weibos
+				for weibos, ok := pending[next]; ok; weibos, ok = pending[next] {
+					delete(pending, next)
+					for _, w := range weibos {
+						_, err := fmt.Fprintf(bw, "%s\t%s\t%s\t%t\t%s\n", w.id, w.url, w.text, w.isLongText, strings.Join(w.links, " , "))
+						if err != nil {
+							log.Fatalln(err)
+						}
+					}
+					// flush per page so rows already fetched survive a later log.Fatalln or interrupt
+					if err := bw.Flush(); err != nil {
+						log.Fatalln(err)
+					}
+					next++
 				}
 				wg.Done()
 			}